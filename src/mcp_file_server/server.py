@@ -1,117 +1,275 @@
+import asyncio
 import base64
-import json
+import errno
+import functools
+import logging
+import os
 import pathlib
-from typing import Annotated, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from stat import S_IFDIR, S_IFLNK, S_IFMT, S_IFREG
+from typing import Annotated, Any, AsyncIterator, Callable, Optional
 
 import click
 from click_params import IP_ADDRESS
 from fastmcp import Context, FastMCP
+from fastmcp.tools.tool import ToolResult
 from fastmcp.utilities.logging import configure_logging, get_logger
 from pydantic import Field
+from starlette.requests import Request
+from starlette.responses import FileResponse, PlainTextResponse, Response
 
 # configure logging
 logger = get_logger(__name__)
 
+# The base path is only changed through set_base_path(), once at startup; the tools treat it as read-only.
 BASE_PATH: pathlib.Path = pathlib.Path("/data")
+# BASE_PATH as a string with a trailing slash, used to build and validate full paths with plain string operations
+_BASE_PATH_STR: str = os.path.join(BASE_PATH, "")
+_BASE_PATH_LEN: int = len(_BASE_PATH_STR)
 
+# Thread pool that runs the blocking file I/O of the tools, set up in main()
+IO_EXECUTOR: Optional[ThreadPoolExecutor] = None
 
-def get_full_path(relative_path: pathlib.Path) -> pathlib.Path:
-    """Get the full path for a given relative path."""
-    if relative_path.is_absolute():
-        return BASE_PATH.joinpath(relative_path.relative_to("/"))
-    else:
-        return BASE_PATH.joinpath(relative_path)
 
+@functools.lru_cache(maxsize=2048)
+def get_full_path(relative_path: str) -> str:
+    """Get the full path for a given relative path.
+
+    Raises a ValueError if the path points outside of the base path. The check is lexical only: ".." components
+    are resolved, symlinks are not, so a symlink inside the base path can still lead outside of it. Results are
+    cached, as clients tend to access the same paths over and over; the cache must be cleared when the base path
+    changes.
+    """
+    full_path = os.path.normpath(_BASE_PATH_STR + relative_path.lstrip("/"))
+    if not (full_path + "/").startswith(_BASE_PATH_STR):
+        raise ValueError(f"Path {relative_path} is outside of the base path.")
+    return full_path
+
+
+def get_relative_path(full_path: str) -> str:
+    """Get the relative path from the base path, for a full path as returned by get_full_path."""
+    return "/" + full_path[_BASE_PATH_LEN:]
+
+
+_FILE_TYPES = {S_IFREG: "file", S_IFDIR: "directory", S_IFLNK: "symlink"}
+# errno values that mean "this path does not exist", mirroring pathlib.Path.exists()
+_MISSING_ERRNOS = (errno.ENOENT, errno.ENOTDIR, errno.ELOOP)
+
+
+def classify_path(full_path: str, follow_symlinks: bool = True) -> Optional[str]:
+    """Tell whether a path is a "file", "directory", "symlink" or "other", or None if it does not exist.
+
+    This takes a single stat call, instead of exists() followed by is_file() or is_dir().
+    """
+    try:
+        mode = os.stat(full_path, follow_symlinks=follow_symlinks).st_mode
+    except OSError as e:
+        if e.errno in _MISSING_ERRNOS:
+            return None
+        raise
+    except ValueError:
+        # embedded null byte
+        return None
+    return _FILE_TYPES.get(S_IFMT(mode), "other")
+
+
+def set_base_path(path: pathlib.Path) -> None:
+    """Set the base path that all file operations are relative to."""
+    global BASE_PATH, _BASE_PATH_STR, _BASE_PATH_LEN
+    BASE_PATH = path
+    _BASE_PATH_STR = os.path.join(os.path.realpath(path), "")
+    _BASE_PATH_LEN = len(_BASE_PATH_STR)
+    get_full_path.cache_clear()
+
+
+_DIR_OPEN_FLAGS = os.O_RDONLY | os.O_DIRECTORY
+_SUBDIR_OPEN_FLAGS = _DIR_OPEN_FLAGS | os.O_NOFOLLOW
+# errno values that mean a subdirectory cannot be read or was removed during a recursive listing; it is then
+# skipped, like Path.walk does. Any other error, such as running out of file descriptors, fails the listing.
+_SKIPPED_DIR_ERRNOS = (errno.EACCES, errno.EPERM, errno.ENOENT, errno.ENOTDIR, errno.ELOOP)
+
+
+def scan_directory(directory: str, flags: int, relative_dir: str, recursive: bool, file_info: list[dict]) -> list[str]:
+    """Describe the entries of a directory and return the names of the subdirectories to descend into.
+
+    The directory is opened once and read with os.scandir on its file descriptor: the file type comes from the
+    directory listing itself, and sizes are looked up with fstatat relative to that descriptor instead of
+    resolving the full path of every entry again. Symlinked directories are not descended into.
+    """
+    dir_fd = os.open(directory, flags)
+    try:
+        with os.scandir(dir_fd) as it:
+            entries = list(it)
+
+        # A list comprehension rather than a generator: it is inlined, so everything in the loop is a fast local
+        prefix = relative_dir.rstrip("/") + "/"
+        file_info += [
+            {
+                "name": entry.name,
+                "full path": prefix + entry.name,
+                "type": "Directory" if entry.is_dir() else "File",
+                "size": entry.stat().st_size if entry.is_file() else "-",
+            }
+            for entry in entries
+        ]
+
+        if not recursive:
+            return []
+        return [entry.name for entry in entries if entry.is_dir(follow_symlinks=False)]
+    finally:
+        os.close(dir_fd)
+
+
+def list_directory(directory: str, recursive: bool) -> list[dict]:
+    """Describe the entries of a directory, descending into subdirectories if recursive is set.
+
+    The tree is walked iteratively, depth first, with a single directory open at a time. Subdirectories are
+    opened with O_NOFOLLOW, so a directory replaced by a symlink in the meantime is not followed.
+    """
+    file_info: list[dict] = []
+    relative_dir = get_relative_path(directory)
+    # Errors reading the requested directory itself are never skipped
+    subdirs = scan_directory(directory, _DIR_OPEN_FLAGS, relative_dir, recursive, file_info)
+
+    # Stack of (full path, relative path) of the subdirectories still to list, the next one on top
+    stack: list[tuple[str, str]] = []
+    parent, parent_relative = directory, relative_dir
+    while True:
+        stack += [(os.path.join(parent, name), parent_relative.rstrip("/") + "/" + name) for name in reversed(subdirs)]
+        if not stack:
+            return file_info
+        parent, parent_relative = stack.pop()
+        try:
+            subdirs = scan_directory(parent, _SUBDIR_OPEN_FLAGS, parent_relative, recursive, file_info)
+        except OSError as e:
+            if e.errno not in _SKIPPED_DIR_ERRNOS:
+                raise
+            subdirs = []
 
-def get_relative_path(full_path: pathlib.Path) -> pathlib.Path:
-    """Get the relative path from the base path."""
-    return pathlib.Path("/").joinpath(full_path.relative_to(BASE_PATH))
 
+# Blocking file operations. The tools run these with asyncio.to_thread, so that each open + read/write
+# is a single job on the thread pool and does not stall the event loop for other requests.
+
+
+def _read_text(path: str) -> str:
+    return pathlib.Path(path).read_text(encoding="utf-8")
+
+
+def _append_text(path: str, content: str) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(content)
+
+
+def _read_bytes(path: str) -> bytes:
+    return pathlib.Path(path).read_bytes()
+
+
+def _write_new_file(path: str, content: bytes) -> None:
+    # O_EXCL makes the existence check and the creation one atomic open call; it also refuses to follow a
+    # symlink at path. Raises FileExistsError if anything already exists there.
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        view = memoryview(content)
+        while view:
+            view = view[os.write(fd, view) :]
+    finally:
+        os.close(fd)
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """Use the I/O thread pool as the default executor of the running event loop."""
+    if IO_EXECUTOR is not None:
+        asyncio.get_running_loop().set_default_executor(IO_EXECUTOR)
+    yield
+
+
+mcp = FastMCP("mcp-file-server", lifespan=lifespan)
+
+
+async def create_file(
+    file_path: str, content: Any, kind: str, ctx: Context, to_bytes: Optional[Callable[[Any], bytes]] = None
+) -> None:
+    """Create a new file with the specified content, shared by the create_*_file tools.
+
+    to_bytes converts the content as passed to the tool to the bytes to write; it runs inside the error handling,
+    so that invalid content is reported like any other error.
+    """
+    full_path = get_full_path(file_path)
+
+    try:
+        if to_bytes is not None:
+            content = to_bytes(content)
+        await asyncio.to_thread(_write_new_file, full_path, content)
+    except FileExistsError:
+        if classify_path(full_path, follow_symlinks=False) == "directory":
+            raise FileExistsError(f"File {file_path} is an existing directory.") from None
+        raise FileExistsError(f"File {file_path} already exists.") from None
+    except Exception as e:
+        logger.error("Error creating %s %s: %s", kind.lower(), full_path, e)
+        await ctx.error(f"Error creating {kind.lower()} {file_path}: {e}")
+        raise e
 
-mcp = FastMCP("mcp-file-server")
+    logger.info("%s %s created successfully.", kind, full_path)
+    await ctx.info(f"{kind} {file_path} was created successfully.")
 
 
-@mcp.tool()
+@mcp.tool(output_schema=None)
 async def list_files(
-    path: Annotated[pathlib.Path, Field(description="The directory path to list files from.")],
+    path: Annotated[str, Field(description="The directory path to list files from.")],
     recursive: Annotated[bool, Field(description="Recursively also show files in subdirectories.")],
     ctx: Context,
-) -> list[dict]:
+) -> ToolResult:
     """List all files in the specified directory"""
 
     full_path = get_full_path(path)
 
-    if not full_path.exists() or not full_path.is_dir():
+    if classify_path(full_path) != "directory":
         raise FileNotFoundError(f"Directory {path} does not exist or is not a directory.")
 
-    file_info = []
-    if recursive:
-        filegen = full_path.rglob("*")
-    else:
-        filegen = full_path.iterdir()
-
-    for f in filegen:
-        file_info.append(
-            {
-                "name": f.name,
-                "full path": get_relative_path(f).as_posix(),
-                "type": "Directory" if f.is_dir() else "File",
-                "size": f.stat().st_size if f.is_file() else "-",
-            }
-        )
+    file_info = await asyncio.to_thread(list_directory, full_path, recursive)
 
-    return file_info
+    # Return a finished result with the same text and structured content FastMCP would build from a list[dict].
+    # The tool has no output schema, so the listing is not validated against one with jsonschema, entry by
+    # entry, on the server and again on the client; for large directories that cost far more than the listing.
+    return ToolResult(content=file_info, structured_content={"result": file_info})
 
 
 @mcp.tool
 async def read_text_file(
-    file_path: Annotated[pathlib.Path, Field(description="The file path to read from.")], ctx: Context
+    file_path: Annotated[str, Field(description="The file path to read from.")], ctx: Context
 ) -> str:
     """Read the contents of a specified file"""
     full_path = get_full_path(file_path)
 
-    if not full_path.exists() or not full_path.is_file():
+    if classify_path(full_path) != "file":
         raise FileNotFoundError(f"File {file_path} does not exist or is not a file.")
 
     try:
-        with open(full_path, "r", encoding="utf-8") as f:
-            content = f.read()
-            logger.debug(f"Read content from {full_path}: {content[:100]}...")  # Log first 100 chars
-            return content
+        content = await asyncio.to_thread(_read_text, full_path)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Read content from %s: %s...", full_path, content[:100])  # Log first 100 chars
+        return content
     except Exception as e:
-        logger.error(f"Error reading file {full_path}: {e}")
+        logger.error("Error reading file %s: %s", full_path, e)
         await ctx.error(f"Error reading file {file_path}: {e}")
         raise e
 
 
 @mcp.tool
 async def create_text_file(
-    file_path: Annotated[pathlib.Path, Field(description="The file path to create.")],
+    file_path: Annotated[str, Field(description="The file path to create.")],
     content: Annotated[str, Field(description="The text content to write to the file.")],
     ctx: Context,
 ) -> None:
     """Create a new text file with the specified content"""
-    full_path = get_full_path(file_path)
-
-    if full_path.exists():
-        if full_path.is_dir():
-            raise FileExistsError(f"File {file_path} is an existing directory.")
-        raise FileExistsError(f"File {file_path} already exists.")
-
-    try:
-        with open(full_path, "w", encoding="utf-8") as f:
-            f.write(content)
-            logger.info(f"Text file {full_path} created successfully.")
-            await ctx.info(f"Text file {file_path} created successfully.")
-    except Exception as e:
-        logger.error(f"Error creating text file {full_path}: {e}")
-        await ctx.error(f"Error creating text file {file_path}: {e}")
-        raise e
+    await create_file(file_path, content, "Text file", ctx, str.encode)
 
 
 @mcp.tool
 async def append_text_file(
-    file_path: Annotated[pathlib.Path, Field(description="The file path to create.")],
+    file_path: Annotated[str, Field(description="The file path to create.")],
     content: Annotated[str, Field(description="The text content to append to the file.")],
     ctx: Context,
 ) -> None:
@@ -119,152 +277,146 @@ async def append_text_file(
 
     full_path = get_full_path(file_path)
 
-    if not full_path.exists() or not full_path.is_file():
+    if classify_path(full_path) != "file":
         raise FileNotFoundError(f"File {file_path} does not exist or is not a file.")
 
     try:
-        with open(full_path, "a", encoding="utf-8") as f:
-            f.write(content)
-            logger.info(f"Text file {full_path} was updated successfully.")
-            await ctx.info(f"Text file {file_path} was updated successfully.")
+        await asyncio.to_thread(_append_text, full_path, content)
+        logger.info("Text file %s was updated successfully.", full_path)
+        await ctx.info(f"Text file {file_path} was updated successfully.")
     except Exception as e:
-        logger.error(f"Error updating text file {full_path}: {e}")
+        logger.error("Error updating text file %s: %s", full_path, e)
         await ctx.error(f"Error updating text file {file_path}: {e}")
         raise e
 
 
 @mcp.tool
 async def read_binary_file(
-    file_path: Annotated[pathlib.Path, Field(description="The binary file path to read from.")], ctx: Context
+    file_path: Annotated[str, Field(description="The binary file path to read from.")], ctx: Context
 ) -> bytes:
     """Read the contents of a specified binary file"""
     full_path = get_full_path(file_path)
 
-    if not full_path.exists() or not full_path.is_file():
+    if classify_path(full_path) != "file":
         raise FileNotFoundError(f"File {file_path} does not exist or is not a file.")
 
     try:
-        with open(full_path, "rb") as f:
-            content = f.read()
-            logger.debug(f"Read binary content from {full_path}")  # Log first 100 bytes
-            return content
+        content = await asyncio.to_thread(_read_bytes, full_path)
+        logger.debug("Read binary content from %s", full_path)  # Log first 100 bytes
+        return content
     except Exception as e:
-        logger.error(f"Error reading file {full_path}: {e}")
+        logger.error("Error reading file %s: %s", full_path, e)
         await ctx.error(f"Error reading file {file_path}: {e}")
         raise e
 
 
 @mcp.tool
 async def create_binary_file(
-    file_path: Annotated[pathlib.Path, Field(description="The binary file path to create.")],
+    file_path: Annotated[str, Field(description="The binary file path to create.")],
     content: Annotated[bytes, Field(description="The binary content to write to the file.")],
     ctx: Context,
 ) -> None:
     """Create a new binary file with the specified content"""
-    full_path = get_full_path(file_path)
-
-    if full_path.exists():
-        if full_path.is_dir():
-            raise FileExistsError(f"File {file_path} is an existing directory.")
-        raise FileExistsError(f"File {file_path} already exists.")
-
-    try:
-        with open(full_path, "wb") as f:
-            f.write(content)
-            logger.info(f"Binary file {file_path} created successfully.")
-            await ctx.info(f"Binary file {file_path} was created successfully.")
-    except Exception as e:
-        logger.error(f"Error creating binary file {full_path}: {e}")
-        await ctx.error(f"Error creating binary file {file_path}: {e}")
-        raise e
+    await create_file(file_path, content, "Binary file", ctx)
 
 
 @mcp.tool
 async def create_binary_file_from_base64(
-    file_path: Annotated[pathlib.Path, Field(description="The binary file path to create.")],
+    file_path: Annotated[str, Field(description="The binary file path to create.")],
     content: Annotated[str, Field(description="The base64-encoded content to write to the file.")],
     ctx: Context,
 ) -> None:
     """Create a new binary file with the specified base64-encoded content"""
-    full_path = get_full_path(file_path)
-
-    if full_path.exists():
-        if full_path.is_dir():
-            raise FileExistsError(f"File {file_path} is an existing directory.")
-        raise FileExistsError(f"File {file_path} already exists.")
-
-    try:
-        with open(full_path, "wb") as f:
-            f.write(base64.b64decode(content))
-            logger.info(f"File {file_path} created successfully.")
-            await ctx.info(f"Binary file {file_path} was created successfully.")
-    except Exception as e:
-        logger.error(f"Error creating binary file {full_path}: {e}")
-        await ctx.error(f"Error creating binary file {file_path}: {e}")
-        raise e
+    await create_file(file_path, content, "Binary file", ctx, base64.b64decode)
 
 
 @mcp.tool
-async def delete_file(
-    file_path: Annotated[pathlib.Path, Field(description="The file path to delete.")], ctx: Context
-) -> None:
-    """Delete a specified file"""
+async def delete_file(file_path: Annotated[str, Field(description="The file path to delete.")], ctx: Context) -> None:
+    """Delete a specified file, or a symlink that does not point to a directory"""
     full_path = get_full_path(file_path)
 
-    if not full_path.exists() or not full_path.is_file():
+    kind = classify_path(full_path, follow_symlinks=False)
+    # A symlink is deleted itself, never its target; dangling symlinks can be deleted too
+    if kind == "symlink" and classify_path(full_path) == "directory":
+        kind = "directory"
+    if kind not in ("file", "symlink"):
         raise FileNotFoundError(f"File {file_path} does not exist or is not a file.")
     try:
-        full_path.unlink()
-        logger.info(f"Successfully deleted file {full_path}")
+        await asyncio.to_thread(os.unlink, full_path)
+        logger.info("Successfully deleted file %s", full_path)
         await ctx.info(f"File {file_path} was deleted successfully.")
     except Exception as e:
-        logger.error(f"Error deleting file {full_path}: {e}")
+        logger.error("Error deleting file %s: %s", full_path, e)
         await ctx.error(f"Error deleting file {file_path}: {e}")
         raise e
 
 
 @mcp.tool
 async def create_directory(
-    dir_path: Annotated[pathlib.Path, Field(description="The directory path to create.")], ctx: Context
+    dir_path: Annotated[str, Field(description="The directory path to create.")], ctx: Context
 ) -> None:
     """Create a new directory"""
     full_path = get_full_path(dir_path)
 
-    if full_path.exists():
-        if full_path.is_file():
+    kind = classify_path(full_path, follow_symlinks=False)
+    if kind is not None:
+        if kind == "file":
             raise FileExistsError(f"File {dir_path} is an existing file.")
+        if kind == "symlink":
+            raise FileExistsError(f"Path {dir_path} is an existing symlink.")
         raise FileExistsError(f"Directory {dir_path} already exists.")
 
     try:
-        full_path.mkdir(parents=True, exist_ok=False)
-        logger.info(f"Successfully created directory {full_path}")
+        await asyncio.to_thread(os.makedirs, full_path, exist_ok=False)
+        logger.info("Successfully created directory %s", full_path)
         await ctx.info(f"Directory {dir_path} created successfully.")
     except Exception as e:
-        logger.error(f"Error creating directory {full_path}: {e}")
+        logger.error("Error creating directory %s: %s", full_path, e)
         await ctx.error(f"Error creating directory {dir_path}: {e}")
         raise e
 
 
 @mcp.tool
 async def delete_directory(
-    dir_path: Annotated[pathlib.Path, Field(description="The directory path to delete.")], ctx: Context
+    dir_path: Annotated[str, Field(description="The directory path to delete.")], ctx: Context
 ) -> None:
     """Delete a specified directory"""
     full_path = get_full_path(dir_path)
 
-    if not full_path.exists() or not full_path.is_dir():
+    if classify_path(full_path, follow_symlinks=False) != "directory":
         raise FileNotFoundError(f"Directory {dir_path} does not exist or is not a directory.")
 
     try:
-        full_path.rmdir()
-        logger.info(f"Successfully deleted directory {full_path}")
+        await asyncio.to_thread(os.rmdir, full_path)
+        logger.info("Successfully deleted directory %s", full_path)
         await ctx.info(f"Directory {dir_path} deleted successfully.")
     except Exception as e:
-        logger.error(f"Error deleting directory {full_path}: {e}")
+        logger.error("Error deleting directory %s: %s", full_path, e)
         await ctx.error(f"Error deleting directory {dir_path}: {e}")
         raise e
 
 
+@mcp.custom_route("/files/{file_path:path}", methods=["GET"])
+async def read_file_raw(request: Request) -> Response:
+    """Stream the raw contents of a file over HTTP (streamable-http transport only).
+
+    Unlike the read_*_file tools the content is not decoded and JSON encoded, nor read into memory as a whole:
+    Starlette's FileResponse streams it in 64 KiB chunks, read on Starlette's own thread pool rather than
+    IO_EXECUTOR. Prefer this for large files.
+    """
+    file_path = request.path_params["file_path"]
+    try:
+        full_path = get_full_path(file_path)
+    except ValueError as e:
+        return PlainTextResponse(str(e), status_code=400)
+
+    if classify_path(full_path) != "file":
+        return PlainTextResponse(f"File {file_path} does not exist or is not a file.", status_code=404)
+
+    logger.debug("Serving raw content of %s", full_path)
+    return FileResponse(full_path)
+
+
 @click.command()
 @click.option(
     "--transport",
@@ -288,17 +440,35 @@ async def delete_directory(
     default="/data",
     help="Base path for the file server",
 )
-def main(transport: str, port: int, host: str, log_level: str, path: pathlib.Path) -> None:
+@click.option(
+    "--io-workers",
+    type=click.IntRange(min=1),
+    default=32,
+    envvar="IO_WORKERS",
+    help="Number of threads for blocking file I/O, i.e. how many file operations can run concurrently",
+)
+def main(transport: str, port: int, host: str, log_level: str, path: pathlib.Path, io_workers: int) -> None:
     # Configure logging
     configure_logging(log_level)  # type: ignore
 
-    global BASE_PATH
-    BASE_PATH = pathlib.Path(path).resolve()
-    if not BASE_PATH.exists():
-        logger.error(f"Base path {BASE_PATH} does not exist.")
+    base_path = pathlib.Path(path).resolve()
+    if not base_path.exists():
+        logger.error("Base path %s does not exist.", base_path)
         return
+    set_base_path(base_path)
 
-    logger.info(f"Using base path: {BASE_PATH}")
+    logger.info("Using base path: %s", BASE_PATH)
+
+    global IO_EXECUTOR
+    IO_EXECUTOR = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="file-io")
+
+    try:
+        import uvloop
+    except ImportError:
+        pass
+    else:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        logger.debug("Using uvloop event loop")
 
     if transport == "streamable-http":
         mcp.run(transport="streamable-http", host=str(host), port=port)
@@ -0,0 +1,11 @@
+import pytest
+
+from mcp_file_server import server
+
+
+@pytest.fixture
+def base_path(tmp_path):
+    old_base_path = server.BASE_PATH
+    server.set_base_path(tmp_path)
+    yield tmp_path
+    server.set_base_path(old_base_path)
@@ -0,0 +1,147 @@
+import errno
+import os
+import pathlib
+import shutil
+
+import pytest
+
+from mcp_file_server import server
+
+
+def open_fds() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+def list_directory(path: str, recursive: bool = True) -> list[dict]:
+    return server.list_directory(server.get_full_path(path), recursive)
+
+
+def full_paths(file_info: list[dict]) -> list[str]:
+    return [entry["full path"] for entry in file_info]
+
+
+@pytest.fixture
+def tree(base_path):
+    (base_path / "a.txt").write_text("abc")
+    (base_path / "sub" / "deeper").mkdir(parents=True)
+    (base_path / "sub" / "x").write_text("x" * 10)
+    (base_path / "sub" / "deeper" / "y").write_text("")
+    (base_path / "other").mkdir()
+    return base_path
+
+
+def fail_opening(monkeypatch, name: str, error: int):
+    """Make os.open fail with the given errno for the directory called name."""
+    real_open = os.open
+
+    def fake_open(path, *args, **kwargs):
+        if isinstance(path, str) and os.path.basename(path) == name:
+            raise OSError(error, os.strerror(error), path)
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, "open", fake_open)
+
+
+def test_list_directory(tree):
+    assert sorted(list_directory("/", recursive=False), key=lambda entry: entry["name"]) == [
+        {"name": "a.txt", "full path": "/a.txt", "type": "File", "size": 3},
+        {"name": "other", "full path": "/other", "type": "Directory", "size": "-"},
+        {"name": "sub", "full path": "/sub", "type": "Directory", "size": "-"},
+    ]
+
+
+def test_list_directory_recursive(tree):
+    file_info = list_directory("/")
+    assert sorted(full_paths(file_info)) == ["/a.txt", "/other", "/sub", "/sub/deeper", "/sub/deeper/y", "/sub/x"]
+    assert {"name": "x", "full path": "/sub/x", "type": "File", "size": 10} in file_info
+
+    # Depth first: a directory is listed before its contents
+    paths = full_paths(file_info)
+    assert paths.index("/sub") < paths.index("/sub/deeper") < paths.index("/sub/deeper/y")
+
+    assert sorted(full_paths(list_directory("/sub"))) == ["/sub/deeper", "/sub/deeper/y", "/sub/x"]
+    assert full_paths(list_directory("/sub/deeper/")) == ["/sub/deeper/y"]
+
+
+def test_list_directory_with_root_base_path(tree):
+    server.set_base_path(pathlib.Path("/"))
+    relative_tree = "/" + str(tree.resolve()).strip("/")
+    assert sorted(full_paths(list_directory(relative_tree + "/sub"))) == [
+        relative_tree + "/sub/deeper",
+        relative_tree + "/sub/deeper/y",
+        relative_tree + "/sub/x",
+    ]
+
+
+def test_list_directory_does_not_descend_into_symlinks(tree):
+    (tree / "link").symlink_to(tree / "sub", target_is_directory=True)
+    file_info = list_directory("/")
+    assert {"name": "link", "full path": "/link", "type": "Directory", "size": "-"} in file_info
+    assert not [path for path in full_paths(file_info) if path.startswith("/link/")]
+
+
+def test_list_directory_skips_vanished_subdirectory(tree, monkeypatch):
+    real_open = os.open
+
+    def racy_open(path, *args, **kwargs):
+        if isinstance(path, str) and os.path.basename(path) == "sub":
+            # Remove it between listing its parent and opening it
+            monkeypatch.setattr(os, "open", real_open)
+            shutil.rmtree(path)
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, "open", racy_open)
+    fds = open_fds()
+    assert sorted(full_paths(list_directory("/"))) == ["/a.txt", "/other", "/sub"]
+    assert open_fds() == fds
+
+
+@pytest.mark.parametrize("error", [errno.EACCES, errno.EPERM])
+def test_list_directory_skips_unreadable_subdirectory(tree, monkeypatch, error):
+    fail_opening(monkeypatch, "sub", error)
+    fds = open_fds()
+    assert sorted(full_paths(list_directory("/"))) == ["/a.txt", "/other", "/sub"]
+    assert open_fds() == fds
+
+
+def test_list_directory_unreadable_directory_fails(tree, monkeypatch):
+    fail_opening(monkeypatch, "sub", errno.EACCES)
+    with pytest.raises(PermissionError):
+        list_directory("/sub")
+
+
+@pytest.mark.parametrize("error", [errno.EMFILE, errno.ENFILE, errno.ENOMEM])
+def test_list_directory_resource_errors_propagate(tree, monkeypatch, error):
+    fail_opening(monkeypatch, "deeper", error)
+    fds = open_fds()
+    with pytest.raises(OSError) as exc_info:
+        list_directory("/")
+    assert exc_info.value.errno == error
+    assert open_fds() == fds
+
+
+def test_list_directory_does_not_leak_fds(tree):
+    fds = open_fds()
+    for _ in range(10):
+        list_directory("/")
+    assert open_fds() == fds
+
+
+def test_list_directory_deep_tree(base_path):
+    # Deeper than the default recursion limit
+    directory = base_path
+    for _ in range(1100):
+        directory /= "d"
+        directory.mkdir()
+    (directory / "f").write_text("")
+
+    try:
+        file_info = list_directory("/")
+        assert len(file_info) == 1101
+        assert file_info[-1]["full path"] == "/d" * 1100 + "/f"
+    finally:
+        # Clean up bottom up, pytest's recursive removal of tmp_path cannot handle this depth
+        (directory / "f").unlink()
+        while directory != base_path:
+            directory.rmdir()
+            directory = directory.parent
@@ -0,0 +1,85 @@
+import pathlib
+
+import pytest
+from starlette.testclient import TestClient
+
+from mcp_file_server import server
+
+
+@pytest.mark.parametrize(
+    "relative_path, expected",
+    [
+        ("", ""),
+        ("/", ""),
+        ("a.txt", "a.txt"),
+        ("/a.txt", "a.txt"),
+        ("/dir/a.txt", "dir/a.txt"),
+        ("/dir/../a.txt", "a.txt"),
+        ("//dir//./a.txt", "dir/a.txt"),
+        ("/dir/..", ""),
+    ],
+)
+def test_get_full_path_inside_base_path(base_path, relative_path, expected):
+    assert server.get_full_path(relative_path) == str(base_path.resolve() / expected)
+
+
+@pytest.mark.parametrize("relative_path", ["..", "/..", "/../..", "../x", "/dir/../../x"])
+def test_get_full_path_outside_base_path(base_path, relative_path):
+    with pytest.raises(ValueError):
+        server.get_full_path(relative_path)
+
+
+def test_get_full_path_rejects_sibling_with_common_prefix(base_path):
+    with pytest.raises(ValueError):
+        server.get_full_path(f"../{base_path.name}-other/x")
+
+
+def test_get_full_path_with_root_base_path():
+    old_base_path = server.BASE_PATH
+    server.set_base_path(pathlib.Path("/"))
+    try:
+        assert server.get_full_path("") == "/"
+        assert server.get_full_path("/") == "/"
+        assert server.get_full_path("/etc/hosts") == "/etc/hosts"
+        assert server.get_full_path("/../..") == "/"
+        assert server.get_relative_path(server.get_full_path("/etc/hosts")) == "/etc/hosts"
+    finally:
+        server.set_base_path(old_base_path)
+
+
+def test_get_full_path_cache_cleared_with_base_path(tmp_path):
+    old_base_path = server.BASE_PATH
+    try:
+        server.set_base_path(tmp_path / "one")
+        assert server.get_full_path("/a.txt") == str(tmp_path / "one" / "a.txt")
+        server.set_base_path(tmp_path / "two")
+        assert server.get_full_path("/a.txt") == str(tmp_path / "two" / "a.txt")
+    finally:
+        server.set_base_path(old_base_path)
+
+
+@pytest.fixture
+def client(base_path):
+    (base_path / "a.txt").write_text("inside")
+    (base_path.parent / "secret.txt").write_text("top secret")
+    with TestClient(server.mcp.http_app()) as client:
+        yield client
+
+
+def test_read_file_raw(client):
+    response = client.get("/files/a.txt")
+    assert response.status_code == 200
+    assert response.text == "inside"
+
+
+@pytest.mark.parametrize(
+    "url", ["/files/%2e%2e/secret.txt", "/files/%2E%2E/%2e%2e/secret.txt", "/files/..%2fsecret.txt"]
+)
+def test_read_file_raw_outside_base_path(client, url):
+    response = client.get(url)
+    assert response.status_code == 400
+    assert "top secret" not in response.text
+
+
+def test_read_file_raw_missing(client):
+    assert client.get("/files/missing.txt").status_code == 404
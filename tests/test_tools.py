@@ -0,0 +1,97 @@
+import base64
+
+import pytest
+from fastmcp import Client
+
+from mcp_file_server import server
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def client(base_path):
+    async with Client(server.mcp) as client:
+        yield client
+
+
+async def call_tool_error(client: Client, name: str, arguments: dict) -> str:
+    result = await client.call_tool(name, arguments, raise_on_error=False)
+    assert result.is_error
+    return result.content[0].text
+
+
+async def test_delete_file(client, base_path):
+    (base_path / "a.txt").write_text("")
+    await client.call_tool("delete_file", {"file_path": "/a.txt"})
+    assert not (base_path / "a.txt").exists()
+
+
+async def test_delete_file_symlinks(client, base_path):
+    (base_path / "a.txt").write_text("")
+    (base_path / "file-link").symlink_to(base_path / "a.txt")
+    (base_path / "dangling-link").symlink_to(base_path / "missing")
+
+    await client.call_tool("delete_file", {"file_path": "/file-link"})
+    await client.call_tool("delete_file", {"file_path": "/dangling-link"})
+    assert not (base_path / "file-link").is_symlink()
+    assert not (base_path / "dangling-link").is_symlink()
+    assert (base_path / "a.txt").exists()
+
+
+async def test_delete_file_refuses_directories(client, base_path):
+    (base_path / "dir").mkdir()
+    (base_path / "dir-link").symlink_to(base_path / "dir", target_is_directory=True)
+
+    for path in ("/dir", "/dir-link", "/missing"):
+        assert "does not exist or is not a file" in await call_tool_error(client, "delete_file", {"file_path": path})
+    assert (base_path / "dir-link").is_symlink()
+
+
+@pytest.mark.parametrize(
+    "tool, content, expected",
+    [
+        ("create_text_file", "héllo", "héllo".encode()),
+        ("create_binary_file_from_base64", base64.b64encode(b"\x00\xff").decode(), b"\x00\xff"),
+    ],
+)
+async def test_create_file(client, base_path, tool, content, expected):
+    await client.call_tool(tool, {"file_path": "/new", "content": content})
+    assert (base_path / "new").read_bytes() == expected
+
+
+async def test_create_file_existing_file(client, base_path):
+    (base_path / "a.txt").write_text("old")
+    error = await call_tool_error(client, "create_text_file", {"file_path": "/a.txt", "content": "new"})
+    assert "File /a.txt already exists." in error
+    assert (base_path / "a.txt").read_text() == "old"
+
+
+async def test_create_file_existing_directory(client, base_path):
+    (base_path / "dir").mkdir()
+    error = await call_tool_error(client, "create_text_file", {"file_path": "/dir", "content": "new"})
+    assert "File /dir is an existing directory." in error
+
+
+async def test_create_file_dangling_symlink(client, base_path):
+    (base_path / "link").symlink_to(base_path / "target")
+    error = await call_tool_error(client, "create_text_file", {"file_path": "/link", "content": "new"})
+    assert "File /link already exists." in error
+    assert not (base_path / "target").exists()
+    assert (base_path / "link").is_symlink()
+
+
+async def test_create_file_invalid_base64(base_path):
+    messages = []
+
+    async def log_handler(message):
+        messages.append(message)
+
+    async with Client(server.mcp, log_handler=log_handler) as client:
+        error = await call_tool_error(
+            client, "create_binary_file_from_base64", {"file_path": "/new", "content": "not base64!"}
+        )
+
+    assert "Invalid base64-encoded string" in error
+    assert [message.level for message in messages] == ["error"]
+    assert messages[0].data["msg"].startswith("Error creating binary file /new: Invalid base64-encoded string")
+    assert not (base_path / "new").exists()